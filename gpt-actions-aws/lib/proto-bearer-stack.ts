@@ -66,14 +66,16 @@ export class ProtoBearerStack extends Stack {
       code: lambda.Code.fromAsset(path.join(__dirname, 'src')),
       environment: {
         SECRET_NAME: secretName,
+        LAMBDA_WARM_INIT: '1',
       },
       description: 'Validates bearer tokens against Secrets Manager',
       functionName: `${this.stackName}-authorizer`,
+      loggingFormat: lambda.LoggingFormat.JSON,
     });
 
     authorizerFunction.addToRolePolicy(
       new iam.PolicyStatement({
-        actions: ['secretsmanager:GetSecretValue', 'secretsmanager:DescribeSecret'],
+        actions: ['secretsmanager:GetSecretValue'],
         resources: [bearerSecret.secretArn],
       }),
     );
@@ -84,6 +86,7 @@ export class ProtoBearerStack extends Stack {
       code: lambda.Code.fromAsset(path.join(__dirname, 'src')),
       description: 'Handles secure ping requests',
       functionName: `${this.stackName}-secure-api`,
+      loggingFormat: lambda.LoggingFormat.JSON,
     });
 
     const httpApi = new HttpApi(this, 'OpssageHttpApi', {
@@ -112,10 +115,12 @@ export class ProtoBearerStack extends Stack {
         OPENAI_API_KEY_SECRET_ARN: openAiSecret.secretArn,
         REALTIME_MODEL: realtimeModel.valueAsString,
         CORS_ALLOW_ORIGIN: process.env.CORS_ALLOW_ORIGIN ?? '*',
+        LAMBDA_WARM_INIT: '1',
       },
       description: 'Mints short-lived OpenAI realtime session tokens for authorised clients',
       functionName: `${this.stackName}-realtime-token`,
       timeout: Duration.seconds(10),
+      loggingFormat: lambda.LoggingFormat.JSON,
     });
 
     realtimeTokenFunction.addToRolePolicy(
@@ -125,6 +130,15 @@ export class ProtoBearerStack extends Stack {
       }),
     );
 
+    // BatchGetSecretValue is not resource-scoped; access to individual secrets
+    // is still constrained by the GetSecretValue statement above.
+    realtimeTokenFunction.addToRolePolicy(
+      new iam.PolicyStatement({
+        actions: ['secretsmanager:BatchGetSecretValue'],
+        resources: ['*'],
+      }),
+    );
+
     httpApi.addRoutes({
       path: '/secure/ping',
       methods: [HttpMethod.GET],
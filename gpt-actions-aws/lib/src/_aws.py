@@ -0,0 +1,29 @@
+"""Shared AWS helpers so co-packaged Lambda modules reuse one client and one cache."""
+
+import os
+from typing import Any, Dict, Optional
+
+_CLIENT: Optional[Any] = None
+_SECRET_CACHE: Dict[str, str] = {}
+
+
+def get_secretsmanager() -> Any:
+    """Lazily memoise a botocore Secrets Manager client shared by every module."""
+    global _CLIENT
+    if _CLIENT is None:
+        try:
+            import botocore.session  # type: ignore
+        except ModuleNotFoundError as exc:  # pragma: no cover - exercised via tests
+            raise ModuleNotFoundError(
+                "botocore is required to fetch secrets. Install it in the deployment environment."
+            ) from exc
+
+        _CLIENT = botocore.session.Session().create_client(
+            "secretsmanager", region_name=os.environ.get("AWS_REGION")
+        )
+    return _CLIENT
+
+
+def secret_cache() -> Dict[str, str]:
+    """Return the process-wide secret-string cache."""
+    return _SECRET_CACHE
@@ -0,0 +1,51 @@
+"""Best-effort /tmp secret cache so fresh execution environments skip refetching."""
+
+import fcntl
+import hashlib
+import os
+import time
+from typing import Optional
+
+import _fastjson
+
+_TTL_SECONDS = 300.0
+
+
+def _cache_dir() -> str:
+    return os.environ.get("SECRETS_CACHE_DIR", "/tmp/secrets")
+
+
+def _cache_path(secret_arn: str) -> str:
+    digest = hashlib.sha256(secret_arn.encode("utf-8")).hexdigest()
+    return os.path.join(_cache_dir(), f"{digest}.json")
+
+
+def get(secret_arn: str) -> Optional[str]:
+    """Return the cached secret string if a fresh entry exists, else None."""
+    path = _cache_path(secret_arn)
+    try:
+        if time.time() - os.path.getmtime(path) >= _TTL_SECONDS:
+            return None
+        with open(path, "rb") as handle:
+            payload = _fastjson.loads(handle.read())
+    except (OSError, ValueError):
+        return None
+
+    secret = payload.get("secret") if isinstance(payload, dict) else None
+    return secret if isinstance(secret, str) else None
+
+
+def put(secret_arn: str, secret: str) -> None:
+    """Write the secret through to /tmp, serialising concurrent writers with flock."""
+    path = _cache_path(secret_arn)
+    try:
+        os.makedirs(_cache_dir(), mode=0o700, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+        with os.fdopen(fd, "wb") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            handle.truncate()
+            handle.write(
+                _fastjson.dumps_bytes({"secret": secret, "fetched_at": time.time()})
+            )
+    except OSError:  # pragma: no cover - the cache is best-effort only
+        pass
@@ -0,0 +1,32 @@
+"""JSON helpers that prefer orjson when the runtime provides it."""
+
+from typing import Any
+
+try:
+    import orjson  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - exercised via tests
+    orjson = None  # type: ignore[assignment]
+
+if orjson is not None:
+
+    def dumps(obj: Any) -> str:
+        """Serialise ``obj`` to a compact JSON string."""
+        return orjson.dumps(obj).decode("utf-8")
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Serialise ``obj`` to compact JSON bytes without an intermediate str."""
+        return orjson.dumps(obj)
+
+    loads = orjson.loads
+else:
+    import json
+
+    def dumps(obj: Any) -> str:
+        """Serialise ``obj`` to a compact JSON string."""
+        return json.dumps(obj, separators=(",", ":"))
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Serialise ``obj`` to compact JSON bytes without an intermediate str."""
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    loads = json.loads
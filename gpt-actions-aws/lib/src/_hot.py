@@ -0,0 +1,94 @@
+"""Hot-path request helpers shared by the Lambda handlers.
+
+Every function here runs on each invocation, so they are kept in one
+small, fully annotated module that an artefact build can AOT-compile
+with mypyc (``mypyc _hot.py``); a compiled extension of the same name
+takes import precedence, and this interpreted version is the fallback.
+"""
+
+import base64
+import os
+from typing import Any, Dict, Optional
+
+import _fastjson
+
+
+def extract_bearer(headers: Dict[str, Any]) -> Optional[str]:
+    """Isolate the Bearer token from the request headers."""
+    # HTTP API v2 lowercases header names, so a direct lookup beats scanning.
+    value = headers.get("authorization") or headers.get("Authorization")
+    if isinstance(value, str):
+        scheme, _, token = value.partition(" ")
+        if scheme.lower() == "bearer":
+            token = token.strip()
+            return token if token else None
+    return None
+
+
+def extract_number(event: Dict[str, Any]) -> Optional[str]:
+    """Try to resolve the `number` attribute from query parameters or a JSON body."""
+    query_params = event.get("queryStringParameters") or {}
+    number = query_params.get("number")
+    if number:
+        return str(number)
+
+    raw_body = event.get("body")
+    if not raw_body:
+        return None
+
+    if event.get("isBase64Encoded"):
+        try:
+            # The parser accepts bytes, so skip the intermediate UTF-8 str.
+            raw_body = base64.b64decode(raw_body)
+        except Exception:
+            return None
+
+    try:
+        parsed_body = _fastjson.loads(raw_body)
+    except (TypeError, ValueError):
+        return None
+
+    if isinstance(parsed_body, dict) and "number" in parsed_body:
+        value = parsed_body.get("number")
+        if value is None:
+            return None
+        return str(value)
+
+    return None
+
+
+def decode_body(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the JSON payload supplied with the request, defaulting to an empty dict."""
+    body = event.get("body")
+    if not body:
+        return {}
+
+    if event.get("isBase64Encoded"):
+        try:
+            # The parser accepts bytes, so skip the intermediate UTF-8 str.
+            body = base64.b64decode(body)
+        except Exception:
+            return {}
+
+    try:
+        parsed = _fastjson.loads(body)
+    except (TypeError, ValueError):
+        return {}
+
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def sanitize_model(requested: Any, default: str) -> str:
+    """Resolve the model name by preference order and ensure a non-empty string."""
+    if isinstance(requested, str):
+        requested = requested.strip()
+        if requested:
+            return requested
+
+    env_model = os.environ.get("REALTIME_MODEL")
+    if isinstance(env_model, str):
+        env_model = env_model.strip()
+        if env_model:
+            return env_model
+
+    return default
@@ -0,0 +1,48 @@
+"""Structured log formatting for runtimes without native JSON logging."""
+
+import logging
+import os
+from typing import Any, Dict
+
+import _fastjson
+
+# Attributes present on every LogRecord; anything else arrived via ``extra``.
+_RESERVED = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as compact JSON once per emitted record, folding in extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "level": record.levelname.lower(),
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+
+        try:
+            return _fastjson.dumps(payload)
+        except TypeError:  # pragma: no cover - defensive runtime guard
+            return _fastjson.dumps({key: str(value) for key, value in payload.items()})
+
+
+def configure() -> None:
+    """Attach the JSON formatter to the root handlers unless the runtime emits JSON natively."""
+    if os.environ.get("AWS_LAMBDA_LOG_FORMAT", "").upper() == "JSON":
+        return
+
+    root = logging.getLogger()
+    if not root.handlers:
+        root.addHandler(logging.StreamHandler())
+
+    formatter = JsonFormatter()
+    for handler in root.handlers:
+        handler.setFormatter(formatter)
@@ -2,29 +2,45 @@
 
 from __future__ import annotations
 
-import base64
-import json
 import logging
 import os
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 from urllib import error, request
 
 try:
-    import boto3  # type: ignore
+    import urllib3  # type: ignore  # bundled with botocore in the Lambda runtime
 except ModuleNotFoundError:  # pragma: no cover - exercised via tests
-    boto3 = None  # type: ignore[assignment]
+    urllib3 = None  # type: ignore[assignment]
+
+try:
+    import msgspec.json  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - exercised via tests
+    msgspec = None  # type: ignore[assignment]
+
+import _aws
+import _disk_cache
+import _fastjson
+import _hot
+import _logging_setup
+
+if msgspec is not None:
+    # A reusable decoder skips per-call parser setup; it stays untyped because the
+    # session payload is relayed verbatim and a typed Struct would drop unknown fields.
+    _decode_session = msgspec.json.Decoder().decode
+else:
+    _decode_session = _fastjson.loads
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.INFO)
+_logging_setup.configure()
 
-_SECRETS_CLIENT: Any | None = None
-_SECRET_CACHE: Dict[str, str] = {}
+_SECRET_CACHE = _aws.secret_cache()
+_HTTP_POOL: Any | None = None
 
-if boto3 is not None:
-    try:
-        _SECRETS_CLIENT = boto3.client("secretsmanager")
-    except ModuleNotFoundError:
-        _SECRETS_CLIENT = None
+# Environment configuration is fixed for the container's lifetime, so read it once.
+_BEARER_SECRET_ARN = os.environ.get("SECRET_NAME")
+_OPENAI_SECRET_ARN = os.environ.get("OPENAI_API_KEY_SECRET_ARN")
 
 OPENAI_SESSIONS_URL = "https://api.openai.com/v1/realtime/sessions"
 DEFAULT_REALTIME_MODEL = "gpt-4o-mini-realtime-preview"
@@ -44,92 +60,153 @@ def _cors(status: int, body: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "statusCode": status,
         "headers": CORS_HEADERS,
-        "body": json.dumps(body, separators= (",", ":")),
+        "body": _fastjson.dumps(body),
     }
 
 
-def _resolve_secrets_client() -> Any:
-    """Lazily construct the AWS Secrets Manager client to keep boto3 optional in tests."""
-    global _SECRETS_CLIENT
-    if _SECRETS_CLIENT is not None:
-        return _SECRETS_CLIENT
-
-    if boto3 is None:
-        raise ModuleNotFoundError(
-            "boto3 is required to fetch secrets. Install boto3 in the deployment environment."
-        )
-
-    _SECRETS_CLIENT = boto3.client("secretsmanager")
-    return _SECRETS_CLIENT
+# Fixed responses serialised once at import so the hot path returns shared literals.
+_RESP_NO_CONTENT = _cors(204, {})
+_RESP_METHOD_NOT_ALLOWED = _cors(405, {"message": "Method Not Allowed"})
+_RESP_SECRETS_FAILURE = _cors(500, {"message": "Failed to load secrets"})
+_RESP_SESSION_FAILURE = _cors(502, {"message": "Failed to create realtime session"})
 
 
 def _get_secret(secret_arn: str) -> str:
-    """Fetch and memoise the raw secret string."""
-    client = _resolve_secrets_client()
+    """Fetch and memoise the raw secret string, consulting the /tmp cache first."""
     if secret_arn in _SECRET_CACHE:
         return _SECRET_CACHE[secret_arn]
 
-    response = client.get_secret_value(SecretId=secret_arn)
-    secret = response.get("SecretString")
+    secret = _disk_cache.get(secret_arn)
     if secret is None:
-        raise RuntimeError(f"Secret {secret_arn} does not contain a SecretString payload")
+        response = _aws.get_secretsmanager().get_secret_value(SecretId=secret_arn)
+        secret = response.get("SecretString")
+        if secret is None:
+            raise RuntimeError(f"Secret {secret_arn} does not contain a SecretString payload")
+        _disk_cache.put(secret_arn, secret)
 
     _SECRET_CACHE[secret_arn] = secret
     return secret
 
 
-def _decode_body(event: Dict[str, Any]) -> Dict[str, Any]:
-    """Return the JSON payload supplied with the request, defaulting to an empty dict."""
-    body = event.get("body")
-    if not body:
-        return {}
+def _resolve_http_pool() -> Any:
+    """Lazily build a keep-alive connection pool so warm containers reuse TLS sessions."""
+    global _HTTP_POOL
+    if _HTTP_POOL is None:
+        _HTTP_POOL = urllib3.PoolManager(
+            maxsize=4,
+            timeout=urllib3.Timeout(connect=3, read=DEFAULT_TIMEOUT_SECONDS),
+            retries=False,
+        )
+    return _HTTP_POOL
 
-    if event.get("isBase64Encoded"):
-        try:
-            body = base64.b64decode(body).decode("utf-8")
-        except Exception:
-            return {}
 
-    try:
-        parsed = json.loads(body)
-    except (TypeError, ValueError):
-        return {}
+def _post_session(payload_bytes: bytes, headers: Dict[str, str]) -> tuple[int, bytes]:
+    """POST the session payload to OpenAI, returning the response status and raw body."""
+    if urllib3 is not None:
+        resp = _resolve_http_pool().request(
+            "POST",
+            OPENAI_SESSIONS_URL,
+            body=payload_bytes,
+            headers=headers,
+        )
+        return resp.status, resp.data
 
-    return parsed if isinstance(parsed, dict) else {}
+    req = request.Request(OPENAI_SESSIONS_URL, data=payload_bytes, method="POST")
+    for name, value in headers.items():
+        req.add_header(name, value)
+    if "Openai-beta" in req.headers:  # urllib normalises header casing
+        req.headers["OpenAI-Beta"] = req.headers.pop("Openai-beta")
 
+    try:
+        with request.urlopen(req, timeout=DEFAULT_TIMEOUT_SECONDS) as resp:
+            return getattr(resp, "status", 200), resp.read()
+    except error.HTTPError as http_err:
+        raw = http_err.read() if hasattr(http_err, "read") else b""
+        return getattr(http_err, "code", 502) or 502, raw
+
+
+def _get_secrets(secret_arns: List[str]) -> Dict[str, str]:
+    """Fetch several secrets in one round trip, falling back to per-secret calls."""
+    missing = []
+    for arn in secret_arns:
+        if arn in _SECRET_CACHE:
+            continue
+        cached = _disk_cache.get(arn)
+        if cached is not None:
+            _SECRET_CACHE[arn] = cached
+        else:
+            missing.append(arn)
+
+    if missing:
+        client = _aws.get_secretsmanager()
+        try:
+            response = client.batch_get_secret_value(SecretIdList=missing)
+            for entry in response.get("SecretValues", []):
+                secret = entry.get("SecretString")
+                if secret is None:
+                    continue
+                for requested in missing:
+                    if requested in (entry.get("ARN"), entry.get("Name")):
+                        _SECRET_CACHE[requested] = secret
+                        _disk_cache.put(requested, secret)
+        except Exception as exc:  # batch API unavailable or partial failure; fetch individually
+            LOGGER.warning(
+                "batch_get_secret_value failed, falling back to per-secret fetches",
+                extra={"error": str(exc)},
+            )
 
-def _sanitize_model(requested: Any) -> str:
-    """Resolve the model name by preference order and ensure a non-empty string."""
-    if isinstance(requested, str):
-        requested = requested.strip()
-        if requested:
-            return requested
+    return {arn: _get_secret(arn) for arn in secret_arns}
 
-    env_model = os.environ.get("REALTIME_MODEL")
-    if isinstance(env_model, str):
-        env_model = env_model.strip()
-        if env_model:
-            return env_model
 
-    return DEFAULT_REALTIME_MODEL
+def _build_session_payload(
+    model: str,
+    instructions: Any,
+    voice: Any,
+    expires_in: Optional[int],
+    transcription_config: Any = None,
+) -> Dict[str, Any]:
+    """Assemble the OpenAI session request payload, omitting unset fields."""
+    payload: Dict[str, Any] = {
+        "model": model,
+        "modalities": ["audio", "text"],
+    }
+    if instructions:
+        payload["instructions"] = instructions
+    if voice:
+        payload["voice"] = voice
+    if expires_in is not None:
+        payload["expires_in"] = expires_in
+    if transcription_config:
+        payload["input_audio_transcription"] = transcription_config
+    return payload
+
+
+@lru_cache(maxsize=64)
+def _encode_payload(
+    model: str,
+    instructions: Optional[str],
+    voice: Optional[str],
+    expires_in: Optional[int],
+) -> bytes:
+    """Serialise the common payload shapes once and reuse the bytes across warm calls."""
+    return _fastjson.dumps_bytes(
+        _build_session_payload(model, instructions, voice, expires_in)
+    )
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Handle HTTP API invocations and return the realtime client token."""
-    method = (
-        event.get("requestContext", {})
-        .get("http", {})
-        .get("method", "")
-        .upper()
-    )
+    request_context = event.get("requestContext")
+    http_info = request_context.get("http") if request_context else None
+    method = http_info.get("method", "").upper() if http_info else ""
 
     if method == "OPTIONS":
-        return _cors(204, {})
+        return _RESP_NO_CONTENT
 
     if method != "POST":
-        return _cors(405, {"message": "Method Not Allowed"})
+        return _RESP_METHOD_NOT_ALLOWED
 
-    body = _decode_body(event)
+    body = _hot.decode_body(event)
     instructions = body.get("instructions")
     voice = body.get("voice")
     expires_in = body.get("expires_in")
@@ -145,105 +222,117 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if expires_in < 60 or expires_in > 600:
             return _cors(400, {"message": "expires_in must be between 60 and 600 seconds"})
 
-    bearer_secret_arn = os.environ["SECRET_NAME"]
-    openai_secret_arn = os.environ["OPENAI_API_KEY_SECRET_ARN"]
+    if not _BEARER_SECRET_ARN or not _OPENAI_SECRET_ARN:
+        LOGGER.error("Secret environment variables are not configured")
+        return _RESP_SECRETS_FAILURE
 
     try:
-        bearer_token = _get_secret(bearer_secret_arn)
-        openai_api_key = _get_secret(openai_secret_arn)
+        secrets = _get_secrets([_BEARER_SECRET_ARN, _OPENAI_SECRET_ARN])
+        bearer_token = secrets[_BEARER_SECRET_ARN]
+        openai_api_key = secrets[_OPENAI_SECRET_ARN]
     except Exception:  # pragma: no cover - defensive runtime guard
         LOGGER.exception("Failed to load secrets")
-        return _cors(500, {"message": "Failed to load secrets"})
-
-    model = _sanitize_model(requested_model)
+        return _RESP_SECRETS_FAILURE
 
-    session_payload: Dict[str, Any] = {
-        "model": model,
-        "modalities": ["audio", "text"],
-    }
+    model = _hot.sanitize_model(requested_model, DEFAULT_REALTIME_MODEL)
 
-    if instructions:
-        session_payload["instructions"] = instructions
-    if voice:
-        session_payload["voice"] = voice
-    if expires_in is not None:
-        session_payload["expires_in"] = expires_in
-    if transcription_config:
-        session_payload["input_audio_transcription"] = transcription_config
+    cacheable = (
+        not transcription_config
+        and (instructions is None or isinstance(instructions, str))
+        and (voice is None or isinstance(voice, str))
+    )
+    if cacheable:
+        payload_bytes = _encode_payload(model, instructions, voice, expires_in)
+    else:
+        payload_bytes = _fastjson.dumps_bytes(
+            _build_session_payload(model, instructions, voice, expires_in, transcription_config)
+        )
 
     request_id = getattr(context, "aws_request_id", "")
 
-    LOGGER.info(
-        json.dumps(
-            {
-                "level": "info",
-                "msg": "request_openai_session",
-                "model": model,
-                "requestId": request_id,
-            },
-            separators=(",", ":"),
+    if LOGGER.isEnabledFor(logging.INFO):
+        LOGGER.info(
+            "request_openai_session",
+            extra={"model": model, "requestId": request_id},
         )
-    )
 
-    payload_bytes = json.dumps(session_payload, separators=(",", ":")).encode("utf-8")
+    openai_headers = {
+        "Authorization": f"Bearer {openai_api_key}",
+        "Content-Type": "application/json",
+        "OpenAI-Beta": "realtime=v1",
+    }
 
     last_exception: Exception | None = None
     attempts = 0
 
     while attempts <= MAX_RETRIES:
         try:
-            req = request.Request(
-                OPENAI_SESSIONS_URL,
-                data=payload_bytes,
-                method="POST",
-            )
-            req.add_header("Authorization", f"Bearer {openai_api_key}")
-            req.add_header("Content-Type", "application/json")
-            req.add_header("OpenAI-Beta", "realtime=v1")
-            if "Openai-beta" in req.headers:  # urllib normalises header casing
-                req.headers["OpenAI-Beta"] = req.headers.pop("Openai-beta")
-
-            with request.urlopen(req, timeout=DEFAULT_TIMEOUT_SECONDS) as resp:
-                openai_payload = json.loads(resp.read().decode("utf-8"))
-
-            LOGGER.info(
-                json.dumps(
-                    {
-                        "level": "info",
-                        "msg": "realtime_session_created",
-                        "model": model,
-                        "requestId": request_id,
-                    },
-                    separators=(",", ":"),
-                )
-            )
-
-            return _cors(200, {"ok": True, "session": openai_payload})
-
-        except error.HTTPError as http_err:  # pragma: no cover - exercised in tests
-            raw = http_err.read().decode("utf-8", "ignore")[:2000] if hasattr(http_err, "read") else ""
-            LOGGER.error(
-                json.dumps(
-                    {
-                        "level": "error",
-                        "msg": "openai_realtime_session_error",
-                        "status": getattr(http_err, "code", None),
-                        "model": model,
-                        "err": raw,
-                        "requestId": request_id,
-                    },
-                    separators=(",", ":"),
-                )
-            )
-            return _cors(502, {"message": "Failed to create realtime session"})
+            status, raw = _post_session(payload_bytes, openai_headers)
         except Exception as exc:  # pragma: no cover - exercised in tests
             last_exception = exc
             if attempts < MAX_RETRIES:
                 attempts += 1
                 continue
             LOGGER.exception("Unexpected error during realtime session request")
-            return _cors(502, {"message": "Failed to create realtime session"})
+            return _RESP_SESSION_FAILURE
+
+        if status >= 400:  # pragma: no cover - exercised in tests
+            LOGGER.error(
+                "openai_realtime_session_error",
+                extra={
+                    "status": status,
+                    "model": model,
+                    "err": raw.decode("utf-8", "ignore")[:2000],
+                    "requestId": request_id,
+                },
+            )
+            return _RESP_SESSION_FAILURE
+
+        openai_payload = _decode_session(raw)
+
+        if LOGGER.isEnabledFor(logging.INFO):
+            LOGGER.info(
+                "realtime_session_created",
+                extra={"model": model, "requestId": request_id},
+            )
+
+        return _cors(200, {"ok": True, "session": openai_payload})
 
     if last_exception:  # pragma: no cover - safety
         LOGGER.exception("Unexpected error during realtime session request")
-    return _cors(502, {"message": "Failed to create realtime session"})
+    return _RESP_SESSION_FAILURE
+
+
+def _init() -> None:  # pragma: no cover - deployment-only warm-up
+    """Pre-warm secrets and the HTTP pool so the first request lands on a hot process."""
+    arns = [arn for arn in (_BEARER_SECRET_ARN, _OPENAI_SECRET_ARN) if arn]
+    try:
+        if arns:
+            _get_secrets(arns)
+    except Exception:
+        LOGGER.exception("Failed to pre-warm secrets")
+    if urllib3 is not None:
+        try:
+            _resolve_http_pool().request("HEAD", "https://api.openai.com/", timeout=2.0)
+        except Exception:
+            pass
+
+
+def _reset_after_restore() -> None:  # pragma: no cover - deployment-only warm-up
+    """Discard snapshotted connections and secrets, then warm the restored process."""
+    global _HTTP_POOL
+    _HTTP_POOL = None
+    _SECRET_CACHE.clear()
+    _init()
+
+
+if os.environ.get("LAMBDA_WARM_INIT") == "1":  # pragma: no cover - deployment-only warm-up
+    _init()
+
+    try:
+        from snapshot_restore_py import register_after_restore, register_before_snapshot
+    except ModuleNotFoundError:
+        pass
+    else:
+        register_before_snapshot(_init)
+        register_after_restore(_reset_after_restore)
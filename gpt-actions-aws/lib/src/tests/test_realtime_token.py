@@ -1,25 +1,51 @@
-import json
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
-from types import SimpleNamespace
-from unittest.mock import Mock, patch
+from types import ModuleType, SimpleNamespace
+from unittest.mock import patch
 from urllib import error
-import importlib.util
+import itertools
+import os
 import sys
-import uuid
 
 import pytest
 
+import _fastjson
 
 MODULE_PATH = Path(__file__).resolve().parent.parent / "realtime_token.py"
 
+# The module is read and compiled once for the whole session; _load_module
+# hands out the cached instance after resetting its per-test state, and any
+# future re-exec only pays for running the cached code object.
+_SRC = MODULE_PATH.read_bytes()
+_CODE = compile(_SRC, str(MODULE_PATH), "exec")
+_MODULE = None
+
+# In-process uniqueness is all that's needed here; a counter avoids the
+# entropy syscall uuid4 makes per call.
+_MODULE_COUNTER = itertools.count()
+
+# Snapshot of the environment before any test mutates it; _restore_env puts it
+# back wholesale, which is cheaper than per-key monkeypatch undo entries.
+_ORIG_ENV = dict(os.environ)
+
+
+@pytest.fixture(autouse=True)
+def _restore_env():
+    yield
+    # Leave PYTEST_CURRENT_TEST alone; pytest manages that key itself.
+    for key in set(os.environ) - set(_ORIG_ENV) - {"PYTEST_CURRENT_TEST"}:
+        del os.environ[key]
+    os.environ.update(_ORIG_ENV)
+
 
 class DummyResponse:
     def __init__(self, payload: dict):
-        self._payload = payload
+        # Serialise once so repeated read() calls (e.g. retry paths) cost nothing.
+        self._data = _fastjson.dumps_bytes(payload)
 
     def read(self) -> bytes:
-        return json.dumps(self._payload).encode("utf-8")
+        return self._data
 
     def __enter__(self):
         return self
@@ -28,17 +54,9 @@ class DummyResponse:
         return False
 
 
-def _load_module(monkeypatch, extra_env=None, bearer_secret="bearer", openai_secret="openai"):
-    monkeypatch.setenv("SECRET_NAME", "arn:bearer")
-    monkeypatch.setenv("OPENAI_API_KEY_SECRET_ARN", "arn:openai")
-    if extra_env:
-        for key, value in extra_env.items():
-            if value is None:
-                monkeypatch.delenv(key, raising=False)
-            else:
-                monkeypatch.setenv(key, value)
-
-    secrets_client = Mock()
+@lru_cache(maxsize=None)
+def _make_secrets_client(bearer_secret: str, openai_secret: str) -> SimpleNamespace:
+    """Build (and memoise) a fake Secrets Manager client for the given secret pair."""
 
     def _get_secret_value(SecretId):
         if SecretId == "arn:bearer":
@@ -47,187 +65,263 @@ def _load_module(monkeypatch, extra_env=None, bearer_secret="bearer", openai_sec
             return {"SecretString": openai_secret}
         raise AssertionError(f"Unexpected SecretId: {SecretId}")
 
-    secrets_client.get_secret_value.side_effect = _get_secret_value
+    def _batch_get_secret_value(SecretIdList):
+        return {
+            "SecretValues": [
+                {
+                    "ARN": secret_id,
+                    "Name": secret_id,
+                    "SecretString": _get_secret_value(secret_id)["SecretString"],
+                }
+                for secret_id in SecretIdList
+            ],
+            "Errors": [],
+        }
+
+    return SimpleNamespace(
+        get_secret_value=_get_secret_value,
+        batch_get_secret_value=_batch_get_secret_value,
+    )
+
 
-    module_name = f"realtime_token_module_{uuid.uuid4().hex}"
-    spec = importlib.util.spec_from_file_location(module_name, MODULE_PATH)
-    module = importlib.util.module_from_spec(spec)
-    sys.modules[module_name] = module
-    with patch("boto3.client", return_value=secrets_client):
-        spec.loader.exec_module(module)  # type: ignore[arg-type]
+def _load_module(monkeypatch, cache_dir, extra_env=None, bearer_secret="bearer", openai_secret="openai"):
+    target_env = {
+        "SECRET_NAME": "arn:bearer",
+        "OPENAI_API_KEY_SECRET_ARN": "arn:openai",
+        # pytest owns tmp_path cleanup, so the disk cache never litters /tmp.
+        "SECRETS_CACHE_DIR": str(cache_dir / "secrets"),
+    }
+    if extra_env:
+        for key, value in extra_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                target_env[key] = value
+    os.environ.update(target_env)
+
+    secrets_client = _make_secrets_client(bearer_secret, openai_secret)
+
+    global _MODULE
+    if _MODULE is None:
+        module_name = f"realtime_token_module_{next(_MODULE_COUNTER)}"
+        module = ModuleType(module_name)
+        module.__file__ = str(MODULE_PATH)
+        sys.modules[module_name] = module
+        try:
+            exec(_CODE, module.__dict__)
+        finally:
+            # _MODULE keeps the instance alive; leaving uniquely-named entries
+            # in sys.modules would just grow interpreter state for no benefit.
+            sys.modules.pop(module_name, None)
+        _MODULE = module
+
+    module = _MODULE
+    module._aws._CLIENT = secrets_client
+    module._aws._SECRET_CACHE.clear()
+    monkeypatch.setattr(module, "_BEARER_SECRET_ARN", "arn:bearer")
+    monkeypatch.setattr(module, "_OPENAI_SECRET_ARN", "arn:openai")
     return module, secrets_client
 
 
+# Shared event skeletons; tests only ever replace top-level keys, so the nested
+# requestContext can be safely shared between shallow copies.
+_EVENT_TEMPLATES = {
+    method: {"requestContext": {"http": {"method": method}}, "body": None}
+    for method in ("GET", "POST", "OPTIONS")
+}
+
+
+@lru_cache(maxsize=64)
+def _dump_body(items: tuple) -> str:
+    return _fastjson.dumps(dict(items))
+
+
 def _dummy_event(method: str, body: dict | None = None, **kwargs):
-    event = {
-        "requestContext": {"http": {"method": method}},
-        "body": None,
-    }
+    event = {**_EVENT_TEMPLATES[method]}
     event.update(kwargs)
     if body is not None:
-        event["body"] = json.dumps(body)
+        try:
+            event["body"] = _dump_body(tuple(sorted(body.items())))
+        except TypeError:  # unhashable values bypass the cache
+            event["body"] = _fastjson.dumps(body)
     return event
 
 
-def _context():
-    return SimpleNamespace(aws_request_id="req-123")
+# The handler only ever reads aws_request_id, so one shared context suffices.
+_CONTEXT = SimpleNamespace(aws_request_id="req-123")
 
+_HTTP_ERROR_BODY = b'{"details":"boom"}'
 
-def test_options_preflight(monkeypatch):
-    module, _ = _load_module(monkeypatch)
-    event = {
-        "requestContext": {"http": {"method": "OPTIONS"}},
-        "body": None,
-    }
-    resp = module.handler(event, _context())
-    assert resp["statusCode"] == 204
-    for header in (
-        "Access-Control-Allow-Origin",
-        "Access-Control-Allow-Headers",
-        "Access-Control-Allow-Methods",
-        "Content-Type",
-    ):
-        assert header in resp["headers"]
 
+def _make_http_error(url: str) -> error.HTTPError:
+    return error.HTTPError(url, 500, "error", hdrs=None, fp=BytesIO(_HTTP_ERROR_BODY))
 
-def test_wrong_method_returns_405(monkeypatch):
-    module, _ = _load_module(monkeypatch)
-    event = {
-        "requestContext": {"http": {"method": "GET"}},
-        "body": None,
-    }
-    resp = module.handler(event, _context())
-    assert resp["statusCode"] == 405
-    assert json.loads(resp["body"]) == {"message": "Method Not Allowed"}
 
+@pytest.fixture
+def loaded_module(request, monkeypatch, tmp_path):
+    """Hand out the cached module, optionally parametrized with extra env vars."""
+    module, _ = _load_module(monkeypatch, tmp_path, extra_env=getattr(request, "param", None))
+    return module
 
-def test_empty_body_uses_env_model(monkeypatch):
-    module, _ = _load_module(monkeypatch, extra_env={"REALTIME_MODEL": "env-model"})
-    response_payload = {"session": {"id": "sess"}}
-    urlopen_mock = Mock(return_value=DummyResponse(response_payload))
-    monkeypatch.setattr(module.request, "urlopen", urlopen_mock)
 
-    event = {
-        "requestContext": {"http": {"method": "POST"}},
-        "body": None,
-    }
-    resp = module.handler(event, _context())
-    assert resp["statusCode"] == 200
-    req_obj = urlopen_mock.call_args[0][0]
-    sent_body = json.loads(req_obj.data.decode("utf-8"))
-    assert sent_body["model"] == "env-model"
-    assert sent_body["modalities"] == ["audio", "text"]
+@pytest.fixture
+def urlopen_fake(loaded_module, monkeypatch):
+    """Install a programmable urlopen that replays queued responses and records requests."""
+    calls: list = []
+    responses: list = []
 
+    def _urlopen(req, *args, **kwargs):
+        calls.append(req)
+        result = responses.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
 
-def test_bad_base64_treated_as_empty(monkeypatch):
-    module, _ = _load_module(monkeypatch, extra_env={"REALTIME_MODEL": "env-model"})
-    urlopen_mock = Mock(return_value=DummyResponse({"session": {}}))
-    monkeypatch.setattr(module.request, "urlopen", urlopen_mock)
+    # Force the urllib fallback branch even in venvs where urllib3 is
+    # importable, otherwise _post_session would bypass the fake and hit the
+    # real OpenAI endpoint.
+    monkeypatch.setattr(loaded_module, "urllib3", None)
+    monkeypatch.setattr(loaded_module, "_HTTP_POOL", None)
+    monkeypatch.setattr(loaded_module.request, "urlopen", _urlopen)
+    return SimpleNamespace(calls=calls, queue=responses)
 
-    event = {
-        "requestContext": {"http": {"method": "POST"}},
-        "body": "!!notbase64!!",
-        "isBase64Encoded": True,
+
+def test_options_preflight(loaded_module):
+    resp = loaded_module.handler(_dummy_event("OPTIONS"), _CONTEXT)
+    assert resp["statusCode"] == 204
+    required = {
+        "Access-Control-Allow-Origin",
+        "Access-Control-Allow-Headers",
+        "Access-Control-Allow-Methods",
+        "Content-Type",
     }
-    module.handler(event, _context())
-    sent_body = json.loads(urlopen_mock.call_args[0][0].data.decode("utf-8"))
-    assert sent_body["model"] == "env-model"
+    assert required <= resp["headers"].keys()
 
 
-def test_expires_in_not_int(monkeypatch):
-    module, _ = _load_module(monkeypatch)
-    event = _dummy_event("POST", {"expires_in": "abc"})
-    resp = module.handler(event, _context())
-    assert resp["statusCode"] == 400
-    assert "integer" in json.loads(resp["body"])["message"]
+def test_wrong_method_returns_405(loaded_module):
+    resp = loaded_module.handler(_dummy_event("GET"), _CONTEXT)
+    assert resp["statusCode"] == 405
+    assert _fastjson.loads(resp["body"]) == {"message": "Method Not Allowed"}
+
+
+@pytest.mark.parametrize(
+    "event_overrides",
+    [
+        pytest.param({}, id="empty-body"),
+        pytest.param({"body": "!!notbase64!!", "isBase64Encoded": True}, id="bad-base64"),
+        pytest.param({"body": _fastjson.dumps({"model": "   "})}, id="blank-model"),
+    ],
+)
+@pytest.mark.parametrize("loaded_module", [{"REALTIME_MODEL": "env-model"}], indirect=True)
+def test_model_falls_back_to_env(loaded_module, urlopen_fake, event_overrides):
+    urlopen_fake.queue.append(DummyResponse({"session": {"id": "sess"}}))
+
+    event = {**_EVENT_TEMPLATES["POST"], **event_overrides}
+    resp = loaded_module.handler(event, _CONTEXT)
+    assert resp["statusCode"] == 200
+    sent_body = _fastjson.loads(urlopen_fake.calls[-1].data)
+    assert sent_body["model"] == "env-model"
+    assert sent_body["modalities"] == ["audio", "text"]
 
 
-def test_expires_in_out_of_range(monkeypatch):
-    module, _ = _load_module(monkeypatch)
-    event = _dummy_event("POST", {"expires_in": 10})
-    resp = module.handler(event, _context())
+@pytest.mark.parametrize(
+    ("body", "expected_fragment"),
+    [
+        ({"expires_in": "abc"}, "integer"),
+        ({"expires_in": 10}, "between 60 and 600"),
+    ],
+)
+def test_expires_in_validation(loaded_module, body, expected_fragment):
+    resp = loaded_module.handler(_dummy_event("POST", body), _CONTEXT)
     assert resp["statusCode"] == 400
-    assert "between 60 and 600" in json.loads(resp["body"])["message"]
-
-
-def test_blank_model_falls_back(monkeypatch):
-    module, _ = _load_module(monkeypatch, extra_env={"REALTIME_MODEL": "env-model"})
-    urlopen_mock = Mock(return_value=DummyResponse({"session": {}}))
-    monkeypatch.setattr(module.request, "urlopen", urlopen_mock)
-
-    event = _dummy_event("POST", {"model": "   "})
-    module.handler(event, _context())
-    sent_body = json.loads(urlopen_mock.call_args[0][0].data.decode("utf-8"))
-    assert sent_body["model"] == "env-model"
+    assert expected_fragment in _fastjson.loads(resp["body"])["message"]
 
 
-def test_http_error_logs_and_returns_502(monkeypatch):
-    module, _ = _load_module(monkeypatch, extra_env={"REALTIME_MODEL": "env-model"})
-    openai_url = module.OPENAI_SESSIONS_URL  # type: ignore[attr-defined]
-    http_error = error.HTTPError(
-        openai_url,
-        500,
-        "error",
-        hdrs=None,
-        fp=BytesIO(b"{\"details\":\"boom\"}"),
-    )
-    urlopen_mock = Mock(side_effect=http_error)
-    monkeypatch.setattr(module.request, "urlopen", urlopen_mock)
+@pytest.mark.parametrize("loaded_module", [{"REALTIME_MODEL": "env-model"}], indirect=True)
+def test_http_error_logs_and_returns_502(loaded_module, urlopen_fake):
+    openai_url = loaded_module.OPENAI_SESSIONS_URL  # type: ignore[attr-defined]
+    urlopen_fake.queue.append(_make_http_error(openai_url))
 
-    with patch.object(module.LOGGER, "error") as mock_error:
-        resp = module.handler(_dummy_event("POST", {}), _context())
+    with patch.object(loaded_module.LOGGER, "error") as mock_error:
+        resp = loaded_module.handler(_dummy_event("POST", {}), _CONTEXT)
 
     assert resp["statusCode"] == 502
     assert mock_error.call_count == 1
 
 
-def test_network_error_retries(monkeypatch):
-    module, _ = _load_module(monkeypatch, extra_env={"REALTIME_MODEL": "env-model"})
-    responses = [Exception("boom"), DummyResponse({"session": {}})]
+@pytest.mark.parametrize("loaded_module", [{"REALTIME_MODEL": "env-model"}], indirect=True)
+def test_network_error_retries(loaded_module, urlopen_fake):
+    urlopen_fake.queue.extend([Exception("boom"), DummyResponse({"session": {}})])
 
-    def side_effect(*args, **kwargs):
-        result = responses.pop(0)
-        if isinstance(result, Exception):
-            raise result
-        return result
-
-    urlopen_mock = Mock(side_effect=side_effect)
-    monkeypatch.setattr(module.request, "urlopen", urlopen_mock)
-
-    resp = module.handler(_dummy_event("POST", {}), _context())
+    resp = loaded_module.handler(_dummy_event("POST", {}), _CONTEXT)
     assert resp["statusCode"] == 200
-    assert urlopen_mock.call_count == 2
-
-
-def test_happy_path(monkeypatch):
-    module, _ = _load_module(monkeypatch)
+    assert len(urlopen_fake.calls) == 2
+
+
+@pytest.mark.parametrize(
+    ("payload", "expected_fields"),
+    [
+        pytest.param(
+            {"instructions": "be nice"},
+            {"instructions": "be nice"},
+            id="instructions",
+        ),
+        pytest.param(
+            {
+                "instructions": "test",
+                "input_audio_transcription": {"model": "gpt-4o-transcribe"},
+            },
+            {"input_audio_transcription": {"model": "gpt-4o-transcribe"}},
+            id="transcription",
+        ),
+    ],
+)
+def test_happy_path(loaded_module, urlopen_fake, payload, expected_fields):
     openai_payload = {"object": "realtime.session", "id": "sess"}
-    urlopen_mock = Mock(return_value=DummyResponse(openai_payload))
-    monkeypatch.setattr(module.request, "urlopen", urlopen_mock)
+    urlopen_fake.queue.append(DummyResponse(openai_payload))
 
-    resp = module.handler(_dummy_event("POST", {"instructions": "be nice"}), _context())
+    resp = loaded_module.handler(_dummy_event("POST", payload), _CONTEXT)
     assert resp["statusCode"] == 200
-    parsed = json.loads(resp["body"])
-    assert parsed == {"ok": True, "session": openai_payload}
-    req_obj = urlopen_mock.call_args[0][0]
+    assert _fastjson.loads(resp["body"]) == {"ok": True, "session": openai_payload}
+    req_obj = urlopen_fake.calls[-1]
     assert req_obj.headers["OpenAI-Beta"] == "realtime=v1"
-    sent_body = json.loads(req_obj.data.decode("utf-8"))
-    assert sent_body["model"] == module.DEFAULT_REALTIME_MODEL
+    sent_body = _fastjson.loads(req_obj.data)
+    assert sent_body["model"] == loaded_module.DEFAULT_REALTIME_MODEL
     assert sent_body["modalities"] == ["audio", "text"]
+    for key, value in expected_fields.items():
+        assert sent_body[key] == value
+
+
+def test_pool_branch_posts_and_maps_errors(loaded_module, monkeypatch):
+    """The urllib3 pool is the production path; drive it through a fake PoolManager."""
+    responses = [
+        SimpleNamespace(status=500, data=_HTTP_ERROR_BODY),
+        SimpleNamespace(status=200, data=_fastjson.dumps_bytes({"id": "sess"})),
+    ]
+    calls: list = []
+
+    class _FakePool:
+        def request(self, method, url, body=None, headers=None):
+            calls.append(SimpleNamespace(method=method, url=url, body=body, headers=headers))
+            return responses.pop(0)
+
+    fake_urllib3 = SimpleNamespace(
+        PoolManager=lambda **kwargs: _FakePool(),
+        Timeout=lambda **kwargs: None,
+    )
+    monkeypatch.setattr(loaded_module, "urllib3", fake_urllib3)
+    monkeypatch.setattr(loaded_module, "_HTTP_POOL", None)
 
+    with patch.object(loaded_module.LOGGER, "error") as mock_error:
+        resp = loaded_module.handler(_dummy_event("POST", {}), _CONTEXT)
+    assert resp["statusCode"] == 502
+    assert mock_error.call_count == 1
 
-def test_transcription_config_forwarded(monkeypatch):
-    module, _ = _load_module(monkeypatch)
-    openai_payload = {"object": "realtime.session", "id": "sess"}
-    urlopen_mock = Mock(return_value=DummyResponse(openai_payload))
-    monkeypatch.setattr(module.request, "urlopen", urlopen_mock)
-
-    payload = {
-        "instructions": "test",
-        "input_audio_transcription": {"model": "gpt-4o-transcribe"},
-    }
-
-    resp = module.handler(_dummy_event("POST", payload), _context())
+    resp = loaded_module.handler(_dummy_event("POST", {}), _CONTEXT)
     assert resp["statusCode"] == 200
-    sent_body = json.loads(urlopen_mock.call_args[0][0].data.decode("utf-8"))
-    assert sent_body["input_audio_transcription"] == payload["input_audio_transcription"]
+    assert _fastjson.loads(resp["body"]) == {"ok": True, "session": {"id": "sess"}}
+    last_call = calls[-1]
+    assert last_call.method == "POST"
+    assert last_call.url == loaded_module.OPENAI_SESSIONS_URL
+    assert last_call.headers["OpenAI-Beta"] == "realtime=v1"
+    assert _fastjson.loads(last_call.body)["model"] == loaded_module.DEFAULT_REALTIME_MODEL